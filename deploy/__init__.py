@@ -1,2 +0,0 @@
-# Make the necessary elements accessible from the package level
-from .utils import serverToken
\ No newline at end of file
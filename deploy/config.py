@@ -3,7 +3,15 @@ import colorama
 import click
 from .utils import log_message, log_error, log_success
 
-def write_server_config_yaml(ssh, node, is_first_server, cfg, first_server_ip=None):
+# Directory holding config.yaml and registries.yaml on every node
+RKE2_CONFIG_DIR = "/etc/rancher/rke2"
+
+def write_remote_file(pool, path, content):
+    """Write content to a root-owned file, piping it over stdin so it needs no shell quoting"""
+    directory = path.rsplit('/', 1)[0]
+    return pool.exec(f"sudo mkdir -p {directory} && sudo tee {path} > /dev/null", input_data=content)
+
+def write_server_config_yaml(pool, node, is_first_server, cfg, first_server_ip=None):
     config = {
         "token": cfg['cluster']['token'],
         "node-name": node['hostname']
@@ -33,17 +41,14 @@ def write_server_config_yaml(ssh, node, is_first_server, cfg, first_server_ip=No
     
     # Properly format the config with yaml dump
     config_yaml = yaml.dump(config, default_flow_style=False)
-    remote_cmd = f"sudo mkdir -p /etc/rancher/rke2 && echo '{config_yaml}' | sudo tee /etc/rancher/rke2/config.yaml > /dev/null"
-    
     log_message(node, "Creating config.yaml with content:", details=f"\n{config_yaml}")
-    stdin, stdout, stderr = ssh.exec_command(remote_cmd)
-    exit_code = stdout.channel.recv_exit_status()
+    exit_code, output, err = write_remote_file(pool, f"{RKE2_CONFIG_DIR}/config.yaml", config_yaml)
     if exit_code == 0:
         log_success(node, "Dynamic server config.yaml written.")
     else:
-        log_error(node, "Failed to write dynamic config.yaml:", details=stderr.read().decode())
+        log_error(node, "Failed to write dynamic config.yaml:", details=err)
 
-def configure_registry(ssh, node, cfg):
+def configure_registry(pool, node, cfg):
     """Configure container registry settings including insecure registries"""
     if 'registry' not in cfg.get('cluster', {}):
         return
@@ -54,19 +59,16 @@ def configure_registry(ssh, node, cfg):
     # Convert the registry config to YAML
     registry_yaml = yaml.dump(registry_config, default_flow_style=False)
     
-    # Create the registries.yaml file
-    registries_cmd = f"sudo mkdir -p /etc/rancher/rke2 && echo '{registry_yaml}' | sudo tee /etc/rancher/rke2/registries.yaml > /dev/null"
-    
     log_message(node, "Creating registry configuration:")
     log_message(node, "Registry config:", details=f"\n{registry_yaml}")
     
-    stdin, stdout, stderr = ssh.exec_command(registries_cmd)
-    exit_code = stdout.channel.recv_exit_status()
+    # Create the registries.yaml file
+    exit_code, output, err = write_remote_file(pool, f"{RKE2_CONFIG_DIR}/registries.yaml", registry_yaml)
     
     if exit_code == 0:
         log_success(node, "Registry configuration created successfully")
     else:
-        log_error(node, "Failed to create registry configuration:", details=stderr.read().decode())
+        log_error(node, "Failed to create registry configuration:", details=err)
     
     # Check if we're configuring insecure registries
     insecure_registries = []
@@ -0,0 +1,196 @@
+import errno
+import functools
+import selectors
+import socket
+import threading
+import time
+import paramiko
+
+# Kernel socket buffers large enough to keep SFTP writes flowing on high-latency links
+SOCKET_BUFFER_SIZE = 32 * 1024 * 1024
+
+# Per-channel receive window and packet size; a large window keeps many SFTP requests in flight
+TRANSPORT_WINDOW_SIZE = 2 ** 27
+TRANSPORT_MAX_PACKET_SIZE = 32768
+# Rekey only after 1 TiB so multi-GB transfers do not stall mid-stream
+REKEY_BYTES = 1 << 40
+
+# Keepalive interval so idle pooled connections survive NAT and firewall timeouts
+KEEPALIVE_INTERVAL = 30
+
+# Handshakes allowed in flight at once and minimum spacing between them; sshd's MaxStartups
+# (default 10) drops unauthenticated connections beyond its limit, which hurts behind a shared bastion
+DEFAULT_MAX_CONCURRENT_CONNECTS = 8
+DEFAULT_CONNECT_INTERVAL_MS = 0
+
+_connect_slots = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENT_CONNECTS)
+_connect_interval = DEFAULT_CONNECT_INTERVAL_MS / 1000
+_last_connect = [0.0]
+_pacing_lock = threading.Lock()
+
+# Resolved addresses are reused for this many seconds; the preflight, every connect and every reconnect
+# to a node look up the same name
+ADDRESS_CACHE_TTL = 300
+
+_address_cache = {}
+_address_lock = threading.Lock()
+
+# How long the preflight waits for every node's SSH port to accept a connection
+PORT_CHECK_TIMEOUT = 5
+
+# Legacy algorithms that are either weak or slow to negotiate
+DISABLED_ALGORITHMS = {
+    'ciphers': ['3des-cbc', 'aes128-cbc', 'aes192-cbc', 'aes256-cbc'],
+    'macs': ['hmac-sha1', 'hmac-sha1-96', 'hmac-md5', 'hmac-md5-96'],
+    'kex': [
+        'diffie-hellman-group1-sha1',
+        'diffie-hellman-group14-sha1',
+        'diffie-hellman-group-exchange-sha1'
+    ]
+}
+
+
+class TunedTransport(paramiko.Transport):
+    """Transport that prefers AES-GCM, which is hardware accelerated and needs no separate MAC"""
+    _preferred_ciphers = tuple(
+        sorted(paramiko.Transport._preferred_ciphers, key=lambda cipher: '-gcm@' not in cipher)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_private_key(key_path):
+    """Parse a private key file once and reuse the key object for every connection"""
+    for key_class in (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey):
+        try:
+            return key_class.from_private_key_file(key_path)
+        except paramiko.PasswordRequiredException:
+            raise
+        except paramiko.SSHException:
+            continue
+    raise paramiko.SSHException(f"Unsupported or invalid private key: {key_path}")
+
+
+def set_connect_limits(max_concurrent=DEFAULT_MAX_CONCURRENT_CONNECTS, interval_ms=DEFAULT_CONNECT_INTERVAL_MS):
+    """Configure how many handshakes may run at once and how far apart they start"""
+    global _connect_slots, _connect_interval
+    _connect_slots = threading.BoundedSemaphore(max(1, max_concurrent))
+    _connect_interval = interval_ms / 1000
+
+
+def _wait_for_connect_turn():
+    """Space out connection attempts by the configured interval"""
+    with _pacing_lock:
+        delay = _last_connect[0] + _connect_interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        _last_connect[0] = time.monotonic()
+
+
+def resolve_address(host, port=22):
+    """Return (family, socktype, proto, address) for a TCP connection, cached for ADDRESS_CACHE_TTL seconds"""
+    now = time.monotonic()
+    with _address_lock:
+        cached = _address_cache.get((host, port))
+        if cached and cached[1] > now:
+            return cached[0]
+    family, socktype, proto, _, address = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0]
+    resolved = (family, socktype, proto, address)
+    with _address_lock:
+        _address_cache[(host, port)] = (resolved, now + ADDRESS_CACHE_TTL)
+    return resolved
+
+
+def open_socket(host, port=22):
+    """Open a TCP socket with Nagle disabled and enlarged send/receive buffers"""
+    family, socktype, proto, address = resolve_address(host, port)
+    sock = socket.socket(family, socktype, proto)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Buffers must be sized before connect() so the window scale is negotiated accordingly
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def check_ports_open(targets, timeout=PORT_CHECK_TIMEOUT):
+    """Probe (host, port) pairs with non-blocking connects sharing one deadline; returns {(host, port): bool}"""
+    results = {}
+    selector = selectors.DefaultSelector()
+    try:
+        for target in set(targets):
+            try:
+                family, socktype, proto, address = resolve_address(*target)
+                sock = socket.socket(family, socktype, proto)
+            except OSError:
+                results[target] = False
+                continue
+            sock.setblocking(False)
+            code = sock.connect_ex(address)
+            if code in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                selector.register(sock, selectors.EVENT_WRITE, target)
+            else:
+                results[target] = code == 0
+                sock.close()
+
+        deadline = time.monotonic() + timeout
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                # A finished connect makes the socket writable; SO_ERROR tells success from refusal
+                results[key.data] = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+    finally:
+        for key in list(selector.get_map().values()):
+            results[key.data] = False
+            key.fileobj.close()
+        selector.close()
+    return results
+
+
+def tune_transport(transport):
+    """Apply window, packet size, rekey and keepalive settings used after connect"""
+    transport.default_window_size = TRANSPORT_WINDOW_SIZE
+    transport.default_max_packet_size = TRANSPORT_MAX_PACKET_SIZE
+    transport.packetizer.REKEY_BYTES = REKEY_BYTES
+    transport.packetizer.REKEY_PACKETS = REKEY_BYTES
+    transport.set_keepalive(KEEPALIVE_INTERVAL)
+
+
+def connect_node(node, compress=False):
+    """Open an SSH connection to a node over a tuned socket"""
+    # Hold a slot only until authentication completes, which is what MaxStartups counts
+    with _connect_slots:
+        _wait_for_connect_turn()
+        return _connect(node, compress)
+
+
+def _connect(node, compress):
+    port = node.get('port', 22)
+    sock = open_socket(node['ip'], port)
+
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        ssh.connect(
+            hostname=node['ip'],
+            port=port,
+            username=node['user'],
+            pkey=load_private_key(node['ssh_key']),
+            sock=sock,
+            compress=compress,
+            disabled_algorithms=DISABLED_ALGORITHMS,
+            transport_factory=TunedTransport
+        )
+    except Exception:
+        sock.close()
+        raise
+
+    tune_transport(ssh.get_transport())
+    return ssh
@@ -1,330 +1,372 @@
 import click
-import os
-import paramiko
+import sys
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import colorama
-from .utils import log_message, log_error, log_success, log_warning
-from .config import write_server_config_yaml, configure_registry
-from .systemd import configure_systemd
+from .utils import log_message, log_error, log_success, log_warning, run_parallel, format_bytes
+from .ssh_pool import connections
+from .config import write_server_config_yaml, configure_registry, RKE2_CONFIG_DIR
+from .systemd import configure_systemd, get_server_token, wait_for_files, SERVER_TOKEN_PATH
+from .transfer import (
+    fetch_bundle_from_peer, upload_bundle_parallel, stream_extract_bundle, verify_remote_bundle,
+    BUNDLE_EXTENSIONS, TAR_DECOMPRESS_OPTIONS, DEFAULT_UPLOAD_WORKERS
+)
 
+# Nodes set up at once after the first server; override with deployment.parallelism
+DEFAULT_PARALLELISM = 5
 
-def setup_node(node, cfg, is_server, is_first_server=False):
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+# Commands printing each optional tool's version after it is installed
+TOOL_VERSION_COMMANDS = {
+    'k9s': "k9s version",
+    'helm': "helm version",
+    'flux': "flux --version"
+}
+
+# Command templates formatted with the node's extract path; {place_images} is ln -sf or cp
+PREPARE_BINARY_COMMANDS = (
+    "sudo cp {extract_path}/rke2/bin/rke2 /usr/local/bin/rke2",
+    "sudo chmod +x /usr/local/bin/rke2",
+    "sudo mkdir -p /var/lib/rancher/rke2/agent/images/",
+    "{place_images} {extract_path}/images/rke2-images.linux-amd64.tar.zst /var/lib/rancher/rke2/agent/images/",
+    # Follows the link to the extracted tarball when the images are linked rather than copied
+    "sudo chmod 644 /var/lib/rancher/rke2/agent/images/rke2-images.linux-amd64.tar.zst"
+)
+
+KUBECTL_COMMANDS = (
+    # Copy kubectl binary to /usr/local/bin
+    "sudo cp {extract_path}/bin/kubectl /usr/local/bin/kubectl",
+    # Update Path
+    "export PATH=/usr/local/bin:$PATH",
+    # Make it executable
+    "sudo chmod +x /usr/local/bin/kubectl",
+    # Create symbolic link to the RKE2 kubeconfig for the current user
+    "mkdir -p $HOME/.kube",
+    "sudo cp /etc/rancher/rke2/rke2.yaml $HOME/.kube/config",
+    "sudo chown $(id -u):$(id -g) $HOME/.kube/config",
+    # Make kubectl usable for root as well
+    "sudo mkdir -p /root/.kube",
+    "sudo cp /etc/rancher/rke2/rke2.yaml /root/.kube/config",
+    # Test kubectl functionality
+    "kubectl version --client"
+)
+
+FLUX_COMPLETION_COMMANDS = [
+    "mkdir -p ~/.config/fish/completions",
+    "flux completion fish > ~/.config/fish/completions/flux.fish",
+    "echo 'source <(flux completion bash)' >> ~/.bashrc"
+]
+
+
+def setup_node(node, cfg, bundle, is_server, is_first_server=False, peer=None, peer_key=None):
+    # By default compress the transport only when uploading a bundle that is not compressed already;
+    # deployment.ssh.compression forces it on (e.g. for slow links) or off (e.g. on 10GbE)
+    ssh_cfg = cfg.get('deployment', {}).get('ssh', {})
+    compress = ssh_cfg.get('compression', not peer and not bundle['format'])
+
+    # The shared connection stays open for the peer key and health check steps
+    pool = connections.get(node, compress=compress)
 
     # Depending on how big the bundle is change this path
-    remote_bundle_path = "/tmp/rke2-airgap-bundle.tar.gz"
+    remote_bundle_path = f"/tmp/rke2-airgap-bundle{BUNDLE_EXTENSIONS[bundle['format']]}"
     extract_path = cfg['cluster']['tar_extract_path']
 
     try:
-        if not os.path.exists(cfg['cluster']['airgap_bundle_path']): 
-            log_error(node, f"Error: Source file {cfg['cluster']['airgap_bundle_path']} does not exist!")
-            return False
-        
         log_message(node, "Connecting to", details=f"{node['ip']}...")
-        ssh.connect(
-            hostname=node['ip'],
-            username=node['user'],
-            key_filename=node['ssh_key']
-        )
+        pool.connect()
+        if pool.compress:
+            log_message(node, "SSH compression:", details=pool.client.get_transport().remote_compression)
 
+        # Every step uses sudo; fail now rather than on the first step that would wait for a password
+        exit_code, output, err = pool.exec("sudo -n true")
+        if exit_code != 0:
+            log_error(node, "Passwordless sudo is required for", details=f"{node['user']}: {err.strip()}")
+            return False
+
+        # The pool keeps this session open for later checks on the node and closes it with the connection
         log_message(node, "Opening SFTP connection...")
-        sftp = ssh.open_sftp()
-
-        # Get file size for progress tracking
-        file_size = os.path.getsize(cfg['cluster']['airgap_bundle_path'])
-        log_message(node, "Uploading", details=f"{file_size/1024/1024:.2f} MB")
-
-        # Upload with progress callback for large files
-        def progress_callback(transferred, total):
-            percentage = (transferred / total) * 100
-            if percentage % 10 < 0.1:  # Report every ~10%
-                log_message(node, "Transfer progress:", details=f"{percentage:.1f}% ({transferred/1024/1024:.2f} MB)")
-
-        # Perform the actual file transfer
-        sftp.put(
-            cfg['cluster']['airgap_bundle_path'], 
-            remote_bundle_path,
-            callback=progress_callback if file_size > 10*1024*1024 else None  # Only use callback for files >10MB
-        )
+        sftp = pool.sftp
 
-        # Verify the file exists on the remote system
-        try:
-            sftp.stat(remote_bundle_path)
-            log_success(node, "Successfully uploaded bundle")
-            
-        except IOError:
-            log_error(node, "Failed to verify file on remote system!")
-            return False
-        
-        # First, check the content structure of the tar file
-        log_message(node, "Checking tar file structure...")
-        stdin, stdout, stderr = ssh.exec_command(f"tar -tf {remote_bundle_path} | head -10")
-        tar_contents = stdout.read().decode('utf-8')
-        log_message(node, "Tar contents (first 10 entries):", details=f"\n{tar_contents}")
-
-        # Create the target directory and ensure permissions
-        log_message(node, "Creating extraction directory...")
-        stdin, stdout, stderr = ssh.exec_command(f"sudo mkdir -p {extract_path}")
-        err = stderr.read().decode('utf-8')
-        if err:
-            log_error(node, "Error creating directory:", details=err)
-
-        # Extract preserving path structure but without top-level directory
-        extract_cmd = f"sudo tar -xzf {remote_bundle_path} --strip-components=1 -C {extract_path}"
-        log_message(node, "Extracting bundle...")
-        
-        # Execute with output capture
-        stdin, stdout, stderr = ssh.exec_command(extract_cmd)
-        
-        # Wait for command to complete and show output
-        extraction_output = stdout.read().decode('utf-8')
-        extraction_error = stderr.read().decode('utf-8')
+        extracted = False
+
+        # A redeploy would overwrite the image behind a still-mounted loop device, and the mount step
+        # below skips an existing mount, so release it before the new image arrives
+        if bundle['format'] == 'squashfs':
+            exit_code, output, err = pool.exec(f"! mountpoint -q {extract_path} || sudo umount {extract_path}")
+            if exit_code != 0:
+                log_error(node, f"Unable to unmount the previous bundle image from {extract_path}:", details=err)
+                return False
+
+        # Pull from a peer that already has the bundle to spare the deploy host's uplink
+        if not (peer and fetch_bundle_from_peer(pool, node, peer, peer_key, remote_bundle_path)):
+            file_size = bundle['size']
+            log_message(node, "Uploading", details=format_bytes(file_size))
+
+            # Report each 10% milestone; only a comparison runs per chunk in between. Parallel upload
+            # workers share this callback, so claiming a milestone is locked, and a jump past several
+            # milestones prints one line rather than a burst of catch-up lines
+            report_step = max(1, file_size // 10)
+            next_report = [report_step]
+            report_lock = threading.Lock()
 
-        if extraction_error:
-            log_error(node, "Error during extraction:", details=extraction_error)
+            def progress_callback(transferred, total):
+                if transferred < next_report[0]:
+                    return
+                with report_lock:
+                    if transferred < next_report[0]:
+                        return
+                    next_report[0] = (transferred // report_step + 1) * report_step
+                log_message(node, "Transfer progress:", details=f"{transferred * 100 // total}% ({format_bytes(transferred)})")
+
+            # Only report for files >10MB, and only when someone is watching the terminal
+            callback = progress_callback if file_size > 10*1024*1024 and sys.stdout.isatty() else None
+
+            # A squashfs image is mounted rather than unpacked, so there is nothing to stream into
+            if cfg['cluster'].get('stream_extract', False) and bundle['format'] != 'squashfs':
+                log_message(node, "Streaming bundle into", details=f"{extract_path}...")
+                exit_code, err = stream_extract_bundle(
+                    pool,
+                    bundle['path'],
+                    remote_bundle_path,
+                    extract_path,
+                    compression=bundle['format'],
+                    callback=callback
+                )
+                if exit_code != 0:
+                    log_error(node, "Error during streamed extraction:", details=err)
+                    log_bundle_diagnostics(pool, node, bundle['path'], extract_path, verbose=cfg.get('verbose', False))
+                    return False
+                extracted = True
+            else:
+                # Perform the actual file transfer
+                upload_bundle_parallel(
+                    pool,
+                    sftp,
+                    bundle['path'], 
+                    remote_bundle_path,
+                    workers=cfg['cluster'].get('upload_workers', DEFAULT_UPLOAD_WORKERS),
+                    callback=callback
+                )
+
+        # Verify the remote copy is intact, not just present
+        verified, detail = verify_remote_bundle(pool, remote_bundle_path, bundle['sha256'])
+        if not verified:
+            log_error(node, "Bundle checksum verification failed:", details=detail)
             return False
-        else:
-            log_success(node, "Extraction completed successfully")
-            
-        # Verify extraction by listing the target directory
-        stdin, stdout, stderr = ssh.exec_command(f"ls -la {extract_path}")
-        directory_contents = stdout.read().decode('utf-8')
-        log_message(node, "Extracted contents:", details=f"\n{directory_contents}")
+        log_success(node, "Successfully uploaded bundle", details=f"(sha256 {detail[:12]}...)")
+        
+        extract_cmd = None
+        if bundle['format'] == 'squashfs':
+            # The image already holds the extracted layout; mount it read-only instead of writing it out
+            log_message(node, "Mounting bundle image...")
+            extract_cmd = (
+                f"sudo mkdir -p {extract_path} && "
+                f"{{ mountpoint -q {extract_path} || sudo mount -o loop,ro {remote_bundle_path} {extract_path}; }}"
+            )
+        elif not extracted:
+            # Create the target directory and extract without the top-level directory in one round-trip
+            log_message(node, "Extracting bundle...")
+            extract_cmd = (
+                f"sudo mkdir -p {extract_path} && "
+                f"sudo tar {TAR_DECOMPRESS_OPTIONS[bundle['format']]} -xf {remote_bundle_path} "
+                f"--strip-components=1 -C {extract_path}"
+            )
 
-        # Configure Registry
-        configure_registry(ssh, node, cfg)
+        if extract_cmd:
+            exit_code, output, err = pool.exec(extract_cmd)
 
-        # Install RPMs
-        log_message(node, "Installing RKE2 RPMs...")
-        rpm_install_cmd = f"sudo yum install -y {extract_path}/rpm/*.rpm"
-        stdin, stdout, stderr = ssh.exec_command(rpm_install_cmd)
+            if exit_code != 0:
+                log_error(node, "Error during extraction:", details=err)
+                log_bundle_diagnostics(pool, node, bundle['path'], extract_path, verbose=cfg.get('verbose', False))
+                return False
 
-        prepare_binary(ssh, node)
+        log_success(node, "Extraction completed successfully")
 
         server_ip = cfg['nodes']['servers'][0]['ip']
 
-        if is_server:
-            log_message(node, "Writing RKE2 config.yaml...")
-            write_server_config_yaml(ssh, node, is_first_server, cfg, server_ip)
+        # The rke2-selinux scriptlets relabel /etc/rancher/rke2 and /var/lib/rancher, so the RPMs go in
+        # before anything writes there
+        install_rpms(pool, node, extract_path)
+
+        # These phases touch separate files, so they run side by side on their own channels
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            phases = [
+                executor.submit(configure_registry, pool, node, cfg),
+                # A loop mount does not survive a reboot, so images from a mounted bundle are copied rather than linked
+                executor.submit(prepare_binary, pool, node, extract_path, link_images=bundle['format'] != 'squashfs')
+            ]
+            if is_server:
+                log_message(node, "Writing RKE2 config.yaml...")
+                phases.append(executor.submit(write_server_config_yaml, pool, node, is_first_server, cfg, server_ip))
+            for phase in phases:
+                phase.result()
 
         # After RPM install
         log_message(node, f"Configuring systemd service for", details=f"{'server' if is_server else 'agent'}")
-        configure_systemd(ssh, extract_path, is_server, server_ip, node)
+        configure_systemd(pool, extract_path, is_server, server_ip, node,
+                          server_token=cfg.get('cluster', {}).get('join_token'))
 
         join_token = None
 
         if is_server and is_first_server:
             # Wait for RKE2 to be fully operational
             log_message(node, "Waiting for RKE2 to be ready before deploying kubectl and other tools...")
-            stdin, stdout, stderr = ssh.exec_command(
-                "timeout 120 bash -c 'until [ -f /etc/rancher/rke2/rke2.yaml ]; do sleep 2; done'"
-            )
-            exit_code = stdout.channel.recv_exit_status()
-            
-            if exit_code == 0:
-                log_message(node, "Retrieving join token for additional servers...")
-                stdin, stdout, stderr = ssh.exec_command("sudo cat /var/lib/rancher/rke2/server/node-token")
-                join_token = stdout.read().decode('utf-8').strip()
-                
+            # The join token is written alongside the kubeconfig, so wait for both before reading it
+            if wait_for_files(pool, [f"{RKE2_CONFIG_DIR}/rke2.yaml", SERVER_TOKEN_PATH]):
+                log_message(node, "Retrieving join token for additional nodes...")
+                join_token = get_server_token(pool, node)
                 if join_token:
-                    log_success(node, "Successfully retrieved join token")
                     cfg['cluster']['join_token'] = join_token
-                else:
-                    log_error(node, "Failed to retrieve join token")
                     
                 log_message(node, "RKE2 configuration detected, deploying kubectl...")
-                deploy_kubectl(ssh, node, extract_path)
+                deploy_kubectl(pool, node, extract_path)
                 if 'extra_tools' in cfg and cfg['extra_tools']:
                     log_message(node, f"Installing additional tools: {', '.join(cfg['extra_tools'])}")
-                    
-                    if 'k9s' in cfg['extra_tools']:
-                        install_k9s(ssh, node, extract_path)
-                    if 'helm' in cfg['extra_tools']:
-                        install_helm(ssh, node, extract_path)
-                    if 'flux' in cfg['extra_tools']:
-                        install_flux(ssh, node, extract_path)
+                    install_extra_tools(pool, node, extract_path, cfg['extra_tools'])
                 return join_token
             else:
                 log_warning(node, "Timed out waiting for RKE2 configuration, skipping kubectl deployment")
             
-        
-        sftp.close()
-        ssh.close()
+        return True
 
     except Exception as e:
         log_error(node, "Error setting up node:", details=str(e))
+        return False
+
+def setup_nodes_parallel(nodes, cfg, bundle, peer=None, peer_key=None, parallelism=None):
+    """Set up (node, is_server) pairs concurrently and return the hostnames that failed"""
+    def setup(pair):
+        node, is_server = pair
+        role = "joining server" if is_server else "agent"
+        log_message(node, f"Setting up {role}", details=f"({node['ip']})")
+        return setup_node(node, cfg, bundle, is_server=is_server, is_first_server=False, peer=peer, peer_key=peer_key)
 
-def prepare_binary(ssh, node):
+    if parallelism is None:
+        parallelism = cfg.get('deployment', {}).get('parallelism', DEFAULT_PARALLELISM)
+    failed = []
+    # One node failing must not stop the others
+    for (node, is_server), succeeded, error in run_parallel(nodes, setup, parallelism):
+        if error:
+            log_error(node, "Error setting up node:", details=str(error))
+
+        if succeeded:
+            log_success(node, "Node setup complete")
+        else:
+            failed.append(node['hostname'])
+
+    return failed
+
+def list_bundle_entries(bundle_path, limit=10):
+    """Read the first tar headers of the local bundle without extracting it"""
+    names = []
+    try:
+        with tarfile.open(bundle_path, 'r:*') as tar:
+            for member in tar:
+                names.append(member.name)
+                if len(names) >= limit:
+                    break
+    except (tarfile.TarError, OSError) as e:
+        names.append(f"Unable to read bundle: {e}")
+    return "\n".join(names)
+
+def log_bundle_diagnostics(pool, node, bundle_path, extract_path, verbose=False):
+    """Log the bundle layout, and with verbose the extraction target, to help diagnose a failed extraction"""
+    log_message(node, "Tar contents (first 10 entries):", details=f"\n{list_bundle_entries(bundle_path)}")
+    if verbose:
+        exit_code, output, err = pool.exec(f"ls -la {extract_path} 2>&1")
+        log_message(node, "Extracted contents:", details=f"\n{output}")
+
+def install_rpms(pool, node, extract_path):
+    """Install the bundled RKE2 RPMs"""
+    log_message(node, "Installing RKE2 RPMs...")
+    # One dnf transaction resolves every bundled RPM together; repos are unreachable when airgapped anyway
+    rpm_install_cmd = f"sudo dnf -y --nogpgcheck --disablerepo='*' install {extract_path}/rpm/*.rpm"
+    exit_code, output, err = pool.exec(rpm_install_cmd)
+    if exit_code != 0:
+        log_error(node, "Failed to install RKE2 RPMs:", details=err)
+
+def prepare_binary(pool, node, extract_path, link_images=True):
     """Prepare the RKE2 binary and images directory"""
     log_message(node, "Preparing rke2 binary...")
-    commands = [
-        "sudo cp /opt/rke2/rke2/bin/rke2 /usr/local/bin/rke2",
-        "sudo chmod +x /usr/local/bin/rke2",
-        "sudo mkdir -p /var/lib/rancher/rke2/agent/images/",
-        "sudo cp /opt/rke2/images/rke2-images.linux-amd64.tar.zst /var/lib/rancher/rke2/agent/images/",
-        "sudo chmod 644 /var/lib/rancher/rke2/agent/images/rke2-images.linux-amd64.tar.zst"
-    ]
+    # Link the image tarball into place rather than copying ~1.5GB on disk
+    values = {'extract_path': extract_path, 'place_images': "sudo ln -sf" if link_images else "sudo cp"}
+    commands = [cmd.format_map(values) for cmd in PREPARE_BINARY_COMMANDS]
     for cmd in commands:
         log_message(node, "Executing:", details=cmd)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
-        if exit_code != 0:
-            err = stderr.read().decode()
-            log_error(node, f"Failed to run: {cmd}", details=err)
 
-def deploy_kubectl(ssh, node, extract_path):
+    for step in pool.run_script(commands):
+        if step.exit_code != 0:
+            log_error(node, f"Failed to run: {step.command}", details=step.output)
+
+def deploy_kubectl(pool, node, extract_path):
     """Deploy kubectl from the RKE2 bundle to the first server node"""
     log_message(node, "Deploying kubectl from RKE2 bundle...")
     
-    commands = [
-        # Copy kubectl binary to /usr/local/bin
-        f"sudo cp {extract_path}/bin/kubectl /usr/local/bin/kubectl",
-        # Update Path
-        "export PATH=/usr/local/bin:$PATH",
-        # Make it executable
-        "sudo chmod +x /usr/local/bin/kubectl",
-        # Create symbolic link to the RKE2 kubeconfig for the current user
-        "mkdir -p $HOME/.kube",
-        "sudo cp /etc/rancher/rke2/rke2.yaml $HOME/.kube/config",
-        "sudo chown $(id -u):$(id -g) $HOME/.kube/config",
-        # Make kubectl usable for root as well
-        "sudo mkdir -p /root/.kube",
-        "sudo cp /etc/rancher/rke2/rke2.yaml /root/.kube/config",
-        # Test kubectl functionality
-        "kubectl version --client"
-    ]
+    commands = [cmd.format(extract_path=extract_path) for cmd in KUBECTL_COMMANDS]
     
     for cmd in commands:
         log_message(node, "Executing:", details=cmd)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
-        
-        if exit_code != 0:
-            err = stderr.read().decode()
-            log_error(node, f"Failed to run: {cmd}", details=err)
-        else:
-            cmd_output = stdout.read().decode().strip()
-            if cmd_output and "version" in cmd:
-                log_message(node, "Kubectl version info:", details=f"\n{cmd_output}")
+
+    for step in pool.run_script(commands, stop_on_error=False):
+        if step.exit_code != 0:
+            log_error(node, f"Failed to run: {step.command}", details=step.output)
+        elif step.output and "version" in step.command:
+            log_message(node, "Kubectl version info:", details=f"\n{step.output}")
     
     # Verify kubectl works by getting nodes
     log_message(node, "Verifying kubectl functionality...")
-    stdin, stdout, stderr = ssh.exec_command("kubectl get nodes")
-    exit_code = stdout.channel.recv_exit_status()
+    exit_code, output, err = pool.exec("kubectl get nodes")
     
     if exit_code == 0:
-        nodes_output = stdout.read().decode()
-        log_success(node, "Kubectl successfully installed and configured:", details=f"\n{nodes_output}")
+        log_success(node, "Kubectl successfully installed and configured:", details=f"\n{output}")
     else:
-        err = stderr.read().decode()
         log_warning(node, "Kubectl installed but test command failed:", details=err)
 
-def install_k9s(ssh, node, extract_path):
-    """Install k9s CLI tool from the RKE2 bundle"""
-    log_message(node, "Installing k9s Kubernetes CLI tool...")
-    
-    # Check if k9s exists in the bundle
-    stdin, stdout, stderr = ssh.exec_command(f"test -f {extract_path}/bin/k9s && echo 'exists'")
-    if stdout.read().decode().strip() != 'exists':
-        log_warning(node, "k9s binary not found in bundle. Skipping installation.")
-        return False
-    
-    commands = [
-        f"sudo cp {extract_path}/bin/k9s /usr/local/bin/k9s",
-        "sudo chmod +x /usr/local/bin/k9s",
-        # "mkdir -p ~/.kube",
-        # "sudo cp /etc/rancher/rke2/rke2.yaml ~/.kube/config",
-        # "sudo chown $(id -u):$(id -g) ~/.kube/config",
-        # "chmod 600 ~/.kube/config",
-        "k9s version || echo 'k9s installed but version check failed'"
-    ]
-    
-    for cmd in commands:
-        log_message(node, "Executing:", details=cmd)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
-        if exit_code != 0:
-            err = stderr.read().decode()
-            log_warning(node, f"Command '{cmd}' may have issues:", details=err)
-        else:
-            output = stdout.read().decode().strip()
-            if output and 'version' in cmd:
-                log_message(node, "k9s version info:", details=output)
-    
-    log_success(node, "k9s Kubernetes UI tool installed successfully")
-    return True
+def install_extra_tools(pool, node, extract_path, tools):
+    """Install the requested CLI tools from the bundle, each on its own channel of the node's transport"""
+    unknown = [tool for tool in tools if tool not in TOOL_VERSION_COMMANDS]
+    for tool in unknown:
+        log_warning(node, f"Unknown tool {tool}. Skipping installation.")
+    tools = [tool for tool in tools if tool in TOOL_VERSION_COMMANDS]
 
-def install_helm(ssh, node, extract_path):
-    """Install Helm from the airgapped bundle"""
-    log_message(node, "Installing Helm package manager...")
-    
-    # Check if helm exists in the bundle
-    stdin, stdout, stderr = ssh.exec_command(f"test -f {extract_path}/bin/helm && echo 'exists'")
-    if stdout.read().decode().strip() != 'exists':
-        log_warning(node, "Helm binary not found in bundle. Skipping installation.")
-        return False
-    
-    commands = [
-        f"sudo cp {extract_path}/bin/helm /usr/local/bin/helm",
-        "sudo chmod +x /usr/local/bin/helm",
-        "helm version || echo 'Helm installed but version check failed'",
-        # Initialize Helm (optional)
-        "helm repo list || true"
-    ]
-    
-    for cmd in commands:
-        log_message(node, "Executing:", details=cmd)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
-        if exit_code != 0:
-            err = stderr.read().decode()
-            log_warning(node, f"Command '{cmd}' may have issues:", details=err)
-        else:
-            output = stdout.read().decode().strip()
-            if output and 'version' in cmd:
-                log_message(node, "Helm version info:", details=output)
-    
-    log_success(node, "Helm package manager installed successfully")
-    return True
+    scripts = []
+    for tool in tools:
+        binary = f"{extract_path}/bin/{tool}"
+        script = (
+            f"if [ ! -f {binary} ]; then echo 'missing:{tool}'; "
+            f"elif sudo install -m755 {binary} /usr/local/bin/{tool}; then echo 'installed:{tool}'; "
+            f"{TOOL_VERSION_COMMANDS[tool]} 2>&1 | sed 's/^/version:{tool}:/'; "
+            f"else echo 'failed:{tool}'; fi"
+        )
+        if tool == 'flux':
+            # Shell completions are best effort and only make sense once flux is in place
+            script += f"\n[ -x /usr/local/bin/flux ] && {{ {'; '.join(FLUX_COMPLETION_COMMANDS)}; }}"
+        scripts.append(script)
 
-def install_flux(ssh, node, extract_path):
-    """Install Flux GitOps CLI from the airgapped bundle"""
-    log_message(node, "Installing Flux GitOps CLI...")
-    
-    # Check if flux exists in the bundle
-    stdin, stdout, stderr = ssh.exec_command(f"test -f {extract_path}/bin/flux && echo 'exists'")
-    if stdout.read().decode().strip() != 'exists':
-        log_warning(node, "Flux binary not found in bundle. Skipping installation.")
-        return False
-    
-    commands = [
-        f"sudo cp {extract_path}/bin/flux /usr/local/bin/flux",
-        "sudo chmod +x /usr/local/bin/flux",
-        "flux --version || echo 'Flux installed but version check failed'"
-    ]
-    
-    for cmd in commands:
-        log_message(node, "Executing:", details=cmd)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
-        if exit_code != 0:
-            err = stderr.read().decode()
-            log_warning(node, f"Command '{cmd}' may have issues:", details=err)
+    # A tool that fails only affects its own channel, the others still complete
+    results = pool.exec_many(scripts)
+
+    installed = []
+    for tool, (exit_code, output, err) in zip(tools, results):
+        status = None
+        versions = []
+        for line in output.splitlines():
+            kind, _, rest = line.partition(':')
+            if kind in ('installed', 'missing', 'failed') and rest == tool:
+                status = kind
+            elif kind == 'version':
+                versions.append(rest.partition(':')[2])
+
+        if status == 'installed':
+            installed.append(tool)
+            if versions:
+                log_message(node, f"{tool} version info:", details="\n".join(versions))
+            log_success(node, f"{tool} installed successfully")
+        elif status == 'missing':
+            log_warning(node, f"{tool} binary not found in bundle. Skipping installation.")
         else:
-            output = stdout.read().decode().strip()
-            if output and 'version' in cmd:
-                log_message(node, "Flux version info:", details=output)
-    
-    # Add auto-completion (optional)
-    completion_cmds = [
-        "mkdir -p ~/.config/fish/completions",
-        "flux completion fish > ~/.config/fish/completions/flux.fish || true",
-        "echo 'source <(flux completion bash)' >> ~/.bashrc || true"
-    ]
-    
-    for cmd in completion_cmds:
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-    
-    log_success(node, "Flux GitOps CLI installed successfully")
-    log_message(node, "Note: For a complete Flux installation in airgapped environments, manual bootstrap steps are required.")
-    return True
+            log_error(node, f"Failed to install {tool}:", details=err)
+
+    if 'flux' in installed:
+        log_message(node, "Note: For a complete Flux installation in airgapped environments, manual bootstrap steps are required.")
+    return installed
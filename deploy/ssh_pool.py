@@ -0,0 +1,248 @@
+import atexit
+import collections
+import contextlib
+import re
+import select
+import socket
+import threading
+import uuid
+from .connection import connect_node
+
+# Stay below OpenSSH's default MaxSessions (10) so channel opens are never refused; the cached
+# SFTP session is held outside this budget, so a node sees at most one more channel than this
+DEFAULT_MAX_SESSIONS = 7
+
+# Line printed after each command of a batched script: ::step-<nonce>::<index>:<exit code>.
+# The nonce is fresh per script so command output can never be mistaken for a marker
+STEP_MARKER = "::step-{nonce}::"
+STEP_PATTERN = r"^::step-{nonce}::(\d+):(\d+)$"
+
+# Largest chunk pulled from a channel buffer per read
+RECV_SIZE = 65536
+
+StepResult = collections.namedtuple('StepResult', ['command', 'exit_code', 'output'])
+
+
+def drain_channel(channel):
+    """Read stdout and stderr as data arrives so neither stream can stall the command"""
+    stdout, stderr = bytearray(), bytearray()
+    while True:
+        while channel.recv_ready():
+            stdout += channel.recv(RECV_SIZE)
+        while channel.recv_stderr_ready():
+            stderr += channel.recv_stderr(RECV_SIZE)
+        # Data delivered between the reads above and the EOF is picked up on the next pass
+        if channel.eof_received and not (channel.recv_ready() or channel.recv_stderr_ready()):
+            return bytes(stdout), bytes(stderr)
+        # The channel's fileno becomes readable on stdout data, stderr data or EOF
+        readable, _, _ = select.select([channel], [], [], channel.gettimeout())
+        if not readable:
+            raise socket.timeout("Timed out waiting for command output")
+
+
+def drain_channels(channels, poll_interval=0.1):
+    """Collect (stdout, stderr) for several channels from one select loop instead of a thread each"""
+    buffers = {channel: (bytearray(), bytearray()) for channel in channels}
+    pending = set(channels)
+    while pending:
+        for channel in list(pending):
+            stdout, stderr = buffers[channel]
+            while channel.recv_ready():
+                stdout += channel.recv(RECV_SIZE)
+            while channel.recv_stderr_ready():
+                stderr += channel.recv_stderr(RECV_SIZE)
+            if channel.eof_received and not (channel.recv_ready() or channel.recv_stderr_ready()):
+                pending.discard(channel)
+        if pending:
+            select.select(list(pending), [], [], poll_interval)
+    return [(bytes(buffers[channel][0]), bytes(buffers[channel][1])) for channel in channels]
+
+
+class SSHPool:
+    """A single authenticated transport per node that hands out a bounded number of channels"""
+
+    def __init__(self, node, max_sessions=DEFAULT_MAX_SESSIONS, compress=False):
+        self.node = node
+        self.compress = compress
+        self._client = None
+        self._sftp = None
+        self._lock = threading.Lock()
+        self._sftp_lock = threading.Lock()
+        self._max_sessions = max_sessions
+        self._sessions = threading.BoundedSemaphore(max_sessions)
+        # Serialises multi-slot acquisition so two exec_many calls cannot each hold part of the slots
+        self._batch_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The underlying SSHClient, connected on first use and reconnected if the session is no longer usable"""
+        with self._lock:
+            if self._client is not None:
+                transport = self._client.get_transport()
+                if transport is None or not (transport.is_active() and transport.is_authenticated()):
+                    self._client.close()
+                    self._client = None
+            if self._client is None:
+                self._client = connect_node(self.node, compress=self.compress)
+            return self._client
+
+    def connect(self):
+        """Establish the connection up front so connection errors surface early"""
+        return self.client
+
+    def open_sftp(self):
+        return self.client.open_sftp()
+
+    @contextlib.contextmanager
+    def sftp_session(self):
+        """A dedicated SFTP session that holds one of the pool's channel slots until it is closed"""
+        with self._sessions:
+            sftp = self.open_sftp()
+            try:
+                yield sftp
+            finally:
+                sftp.close()
+
+    @property
+    def sftp(self):
+        """An SFTP session kept open on the connection for metadata checks and small transfers"""
+        with self._sftp_lock:
+            if self._sftp is None or self._sftp.get_channel().closed:
+                self._sftp = self.open_sftp()
+            return self._sftp
+
+    @contextlib.contextmanager
+    def session(self, timeout=None):
+        """A fresh channel on the shared transport that holds one of the pool's channel slots until it is closed"""
+        with self._sessions:
+            channel = self.client.get_transport().open_session()
+            try:
+                channel.settimeout(timeout)
+                yield channel
+            finally:
+                channel.close()
+
+    def exec(self, cmd, input_data=None, timeout=None):
+        """Run a command on a fresh channel of the shared transport and return (exit_code, stdout, stderr)"""
+        with self.session(timeout) as channel:
+            channel.exec_command(cmd)
+            if input_data is not None:
+                channel.sendall(input_data.encode('utf-8'))
+                channel.shutdown_write()
+            stdout, stderr = drain_channel(channel)
+            exit_code = channel.recv_exit_status()
+
+        return exit_code, stdout.decode('utf-8', 'replace'), stderr.decode('utf-8', 'replace')
+
+    def exec_many(self, commands):
+        """Run commands concurrently on separate channels and return (exit_code, stdout, stderr) for each"""
+        results = []
+        for start in range(0, len(commands), self._max_sessions):
+            batch = commands[start:start + self._max_sessions]
+            with self._batch_lock:
+                for _ in batch:
+                    self._sessions.acquire()
+            channels = []
+            try:
+                transport = self.client.get_transport()
+                for cmd in batch:
+                    channel = transport.open_session()
+                    channels.append(channel)
+                    channel.exec_command(cmd)
+                outputs = drain_channels(channels)
+                for channel, (stdout, stderr) in zip(channels, outputs):
+                    results.append((channel.recv_exit_status(),
+                                    stdout.decode('utf-8', 'replace'), stderr.decode('utf-8', 'replace')))
+            finally:
+                for channel in channels:
+                    channel.close()
+                for _ in batch:
+                    self._sessions.release()
+        return results
+
+    def run_script(self, commands, stop_on_error=True):
+        """Run a list of commands as one script on a single channel and return a StepResult per executed command"""
+        nonce = uuid.uuid4().hex
+        marker = STEP_MARKER.format(nonce=nonce)
+        pattern = re.compile(STEP_PATTERN.format(nonce=nonce))
+        lines = []
+        for index, cmd in enumerate(commands):
+            # stdin is the script itself, so a step that reads it would swallow the steps after it
+            lines.append(f"{{ {cmd}\n}} </dev/null 2>&1; rc=$?; printf '\\n{marker}%d:%d\\n' {index} $rc")
+            if stop_on_error:
+                lines.append('[ $rc -eq 0 ] || exit $rc')
+
+        exit_code, output, err = self.exec("bash -s", input_data="\n".join(lines) + "\n")
+
+        results = []
+        step_output = []
+        for line in output.splitlines():
+            match = pattern.match(line)
+            if match:
+                index, step_exit_code = int(match.group(1)), int(match.group(2))
+                results.append(StepResult(commands[index], step_exit_code, "\n".join(step_output).strip()))
+                step_output = []
+            else:
+                step_output.append(line)
+
+        # The script ended before reporting every step without a step failing (a step ran exit, or
+        # the shell died), so report the next step as failed with whatever the channel returned
+        if len(results) < len(commands) and not (results and results[-1].exit_code != 0 and stop_on_error):
+            details = "\n".join(step_output + [err]).strip() or "script ended before this step reported"
+            results.append(StepResult(commands[len(results)], exit_code or 1, details))
+        return results
+
+    def close(self):
+        with self._sftp_lock:
+            if self._sftp is not None:
+                self._sftp.close()
+                self._sftp = None
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SSHConnectionPool:
+    """Process-wide registry handing out one SSHPool per (host, port, user, key)"""
+
+    def __init__(self):
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(node):
+        return (node['ip'], node.get('port', 22), node['user'], node['ssh_key'])
+
+    def get(self, node, compress=False):
+        """Return the node's shared SSHPool; compress only applies when it is first created"""
+        key = self._key(node)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = SSHPool(node, compress=compress)
+            return pool
+
+    def close(self, node):
+        """Close and forget the node's pool, if it has one"""
+        with self._lock:
+            pool = self._pools.pop(self._key(node), None)
+        if pool is not None:
+            pool.close()
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+
+connections = SSHConnectionPool()
+atexit.register(connections.close_all)
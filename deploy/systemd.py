@@ -1,55 +1,63 @@
 import colorama
 import click
-from .utils import log_message, log_error, log_success, log_warning, serverToken
+from concurrent.futures import ThreadPoolExecutor
+from .utils import log_message, log_error, log_success, log_warning
+from .config import write_remote_file, RKE2_CONFIG_DIR
 
-def configure_systemd(ssh, extract_path, is_server, server_ip, node):
-    global serverToken
+# Ports opened on servers (supervisor, API server, flannel VXLAN, kubelet) and closed again on uninstall
+SERVER_FIREWALL_PORTS = ("9345/tcp", "6443/tcp", "8472/udp", "10250/tcp")
+
+SERVER_TOKEN_PATH = "/var/lib/rancher/rke2/server/node-token"
+
+def configure_systemd(pool, extract_path, is_server, server_ip, node, server_token=None):
+    """Install and start the RKE2 unit; agents join with server_token, which setup_node reads from the first server"""
     service_type = "server" if is_server else "agent"
     service_file = f"{extract_path}/systemd/rke2-{service_type}.service"
     target_path = f"/etc/systemd/system/rke2-{service_type}.service"
 
     commands = [
         f"sudo cp {service_file} {target_path}",
-        "sudo systemctl daemon-reexec",
-        "sudo systemctl daemon-reload",
-        f"sudo systemctl enable rke2-{service_type}.service"
+        "sudo systemctl daemon-reload"
     ]
 
     if service_type == 'agent':
         log_message(node, "Running agent connection...")
-        agent_connection(ssh, serverToken, server_ip, node)
+        agent_connection(pool, server_token, server_ip, node)
+
+    commands.append(f"sudo systemctl enable --now rke2-{service_type}.service")
+    commands.append(f"sudo systemctl status rke2-{service_type}.service --no-pager")
 
-    if service_type == 'server': 
-        log_message(node, "Configuring firewall rules...")
+    # Open every port at runtime in one invocation, then persist the zone with a single write;
+    # the rules are live as soon as they are added, so no reload is needed
+    firewall_rules = []
+    if service_type == 'server':
         firewall_rules = [
-            "sudo firewall-cmd --permanent --add-port=9345/tcp",
-            "sudo firewall-cmd --permanent --add-port=6443/tcp",
-            "sudo firewall-cmd --permanent --add-port=8472/udp",
-            "sudo firewall-cmd --permanent --add-port=10250/tcp",
-            "sudo firewall-cmd --reload"
+            "sudo firewall-cmd " + " ".join(f"--add-port={port}" for port in SERVER_FIREWALL_PORTS),
+            "sudo firewall-cmd --runtime-to-permanent"
         ]
-        commands.extend(firewall_rules)
 
-    commands.append(f"sudo systemctl start rke2-{service_type}.service")
-    commands.append(f"sudo systemctl status rke2-{service_type}.service --no-pager")
-
-    for cmd in commands:
+    for cmd in commands + firewall_rules:
         log_message(node, "Executing:", details=cmd)
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
-        if exit_code != 0:
-            err = stderr.read().decode()
-            log_error(node, f"Error running '{cmd}':", details=err)
-        else:
-            cmd_output = stdout.read().decode()
-            if 'status' in cmd:
-                log_message(node, "Command output:", details=f"\n{cmd_output}")
-            
-    if service_type == 'server': 
-        log_message(node, "Retrieving node token...")
-        serverToken = get_server_token(ssh, node) 
 
-def agent_connection(ssh, server_token, server_ip, node):
+    # enable --now blocks until the server is up, which takes a while; the ports are only needed
+    # by nodes joining later, so the firewall is configured on a second channel in the meantime
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        firewall = None
+        if firewall_rules:
+            log_message(node, "Configuring firewall rules...")
+            firewall = executor.submit(pool.run_script, firewall_rules, stop_on_error=False)
+        # Every step runs even if an earlier one fails, matching the previous one-channel-per-command behaviour
+        steps = pool.run_script(commands, stop_on_error=False)
+        if firewall:
+            steps = firewall.result() + steps
+
+    for step in steps:
+        if step.exit_code != 0:
+            log_error(node, f"Error running '{step.command}':", details=step.output)
+        elif 'status' in step.command:
+            log_message(node, "Command output:", details=f"\n{step.output}")
+
+def agent_connection(pool, server_token, server_ip, node):
     try:
         if not server_token:
             log_warning(node, "Warning: Server token is empty or not retrieved yet!")
@@ -58,26 +66,20 @@ def agent_connection(ssh, server_token, server_ip, node):
         config_content = f"""server: https://{server_ip}:9345
 token: {server_token}
 """ 
-        cmd = f"sudo mkdir -p /etc/rancher/rke2 && echo '{config_content}' | sudo tee /etc/rancher/rke2/config.yaml > /dev/null"
-
         log_message(node, "Creating agent config with:", details=f"\n{config_content}")
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        exit_code = stdout.channel.recv_exit_status()
+        exit_code, output, err = write_remote_file(pool, f"{RKE2_CONFIG_DIR}/config.yaml", config_content)
         if exit_code == 0:
             log_success(node, "Agent config.yaml created successfully.")
         else:
-            log_error(node, "Error creating agent config.yaml:", details=stderr.read().decode())
+            log_error(node, "Error creating agent config.yaml:", details=err)
     except Exception as e:
         log_error(node, "Failed to configure agent:", details=str(e))
 
-def get_server_token(ssh, node):
+def get_server_token(pool, node):
     try:
         # Execute the command to read the token
-        stdin, stdout, stderr = ssh.exec_command("sudo cat /var/lib/rancher/rke2/server/node-token")
-        
-        # Read the output and error streams
-        node_token = stdout.read().decode('utf-8').strip()
-        error = stderr.read().decode('utf-8')
+        exit_code, output, error = pool.exec(f"sudo cat {SERVER_TOKEN_PATH}")
+        node_token = output.strip()
         
         # Check if there was an error
         if error:
@@ -94,4 +96,11 @@ def get_server_token(ssh, node):
 
     except Exception as e:
         log_error(node, "Exception retrieving node token:", details=str(e))
-        return None
\ No newline at end of file
+        return None
+
+def wait_for_files(pool, paths, timeout=120, interval=0.5):
+    """Poll on the node until every path exists; one round trip, returns False if timeout seconds pass first"""
+    # One sudo for the whole loop rather than a sudo per test every interval
+    condition = " && ".join(f"test -f {path}" for path in paths)
+    exit_code, output, err = pool.exec(f"sudo timeout {timeout} bash -c 'until {condition}; do sleep {interval}; done'")
+    return exit_code == 0
@@ -0,0 +1,282 @@
+import hashlib
+import io
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import paramiko
+from .ssh_pool import drain_channel
+from .utils import log_message, log_success, log_warning
+
+# Comment tagged onto the ephemeral key so it can be revoked afterwards
+PEER_KEY_COMMENT = "rke2-installer-peer"
+
+# Local read size; paramiko splits each write into 32 KiB SFTP requests
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Bundles at least this large are split into ranges uploaded over several SFTP sessions
+PARALLEL_UPLOAD_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_UPLOAD_WORKERS = 4
+
+# Seconds a streamed extraction may go without accepting data or reporting its result
+STREAM_EXTRACT_TIMEOUT = 300
+
+# Leading bytes of the formats a bundle may use; all of them are compressed, so SSH compression would only burn CPU
+BUNDLE_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bzip2'),
+    (b'hsqs', 'squashfs')
+)
+
+# tar options that decompress each bundle format
+TAR_DECOMPRESS_OPTIONS = {
+    'gzip': "-z",
+    'zstd': "--use-compress-program=zstd",
+    'xz': "-J",
+    'bzip2': "-j",
+    None: ""
+}
+
+BUNDLE_EXTENSIONS = {
+    'gzip': ".tar.gz",
+    'zstd': ".tar.zst",
+    'xz': ".tar.xz",
+    'bzip2': ".tar.bz2",
+    'squashfs': ".sqfs",
+    None: ".tar"
+}
+
+
+def detect_bundle_format(path):
+    """Name the bundle format from its magic bytes, or None for a plain tarball"""
+    with open(path, 'rb') as f:
+        header = f.read(6)
+    for magic, bundle_format in BUNDLE_MAGIC:
+        if header.startswith(magic):
+            return bundle_format
+    return None
+
+
+def file_sha256(path):
+    """Hash a local file, using OpenSSL's streaming digest where the Python version provides it"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        # Older Pythons: hash the whole mapping in one update call instead of looping over reads
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        return digest.hexdigest()
+
+
+def verify_remote_bundle(pool, remote_path, expected_sha256):
+    """Compare the remote file's SHA-256 with the local bundle's; returns (matches, detail)"""
+    exit_code, output, err = pool.exec(f"sha256sum {remote_path}")
+    if exit_code != 0:
+        return False, err.strip()
+    remote_sha256 = output.split()[0] if output.split() else ''
+    if remote_sha256 != expected_sha256:
+        return False, f"expected {expected_sha256}, got {remote_sha256}"
+    return True, remote_sha256
+
+
+def describe_bundle(path):
+    """Stat and hash the local bundle once so every node setup shares the same path, size, format and checksum"""
+    return {
+        'path': path,
+        'size': os.path.getsize(path),
+        'format': detect_bundle_format(path),
+        'sha256': file_sha256(path)
+    }
+
+
+def generate_peer_key():
+    """Generate an ephemeral key used by nodes to pull the bundle from a peer"""
+    return paramiko.RSAKey.generate(2048)
+
+
+def authorize_peer_key(pool, peer_key, allowed_ips):
+    """Allow the ephemeral peer key to log in to the node serving the bundle from the given addresses"""
+    node = pool.node
+    try:
+        # No forwarding, pty or agent for the key, and only from the nodes that pull the bundle
+        options = f'restrict,from="{",".join(allowed_ips)}"'
+        public_key = f"{options} {peer_key.get_name()} {peer_key.get_base64()} {PEER_KEY_COMMENT}"
+        cmd = (
+            "mkdir -p ~/.ssh && chmod 700 ~/.ssh && "
+            f"echo '{public_key}' >> ~/.ssh/authorized_keys && chmod 600 ~/.ssh/authorized_keys"
+        )
+        exit_code, output, err = pool.exec(cmd)
+
+        if exit_code != 0:
+            log_warning(node, "Unable to authorize peer key, nodes will upload from the deploy host:",
+                        details=err)
+            return False
+
+        log_success(node, "Peer key authorized, other nodes will pull the bundle from this node")
+        return True
+
+    except Exception as e:
+        log_warning(node, "Unable to authorize peer key:", details=str(e))
+        return False
+
+
+def revoke_peer_key(pool):
+    """Remove the ephemeral peer key from the node serving the bundle"""
+    node = pool.node
+    try:
+        exit_code, output, err = pool.exec(f"sed -i '/ {PEER_KEY_COMMENT}$/d' ~/.ssh/authorized_keys")
+        if exit_code == 0:
+            log_message(node, "Revoked peer key")
+        else:
+            log_warning(node, "Failed to revoke peer key:", details=err)
+
+    except Exception as e:
+        log_warning(node, "Failed to revoke peer key:", details=str(e))
+
+
+def fetch_bundle_from_peer(pool, node, peer, peer_key, remote_bundle_path):
+    """Copy the bundle from a peer node that already has it instead of uploading it again"""
+    log_message(node, "Fetching bundle from peer", details=f"{peer['hostname']} ({peer['ip']})...")
+
+    # The key goes over stdin into a private mktemp file, so it never sits at a predictable path
+    key_file = io.StringIO()
+    peer_key.write_private_key(key_file)
+
+    scp_cmd = (
+        'scp -q -i "$f" '
+        "-o BatchMode=yes -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null "
+        f"{peer['user']}@{peer['ip']}:{remote_bundle_path} {remote_bundle_path}"
+    )
+    exit_code, output, err = pool.exec(f'f=$(mktemp) && cat > "$f" && {scp_cmd}; rc=$?; rm -f "$f"; exit $rc',
+                                       input_data=key_file.getvalue())
+
+    if exit_code != 0:
+        log_warning(node, "Peer transfer failed, falling back to direct upload:", details=err)
+        return False
+
+    log_success(node, "Bundle copied from peer")
+    return True
+
+
+def _copy_range(local_file, remote_file, length, on_progress=None):
+    """Stream length bytes from the local file's position into a pipelined remote file"""
+    buffer = bytearray(READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    remaining = length
+
+    remote_file.set_pipelined(True)
+    while remaining > 0:
+        count = local_file.readinto(view[:min(READ_BUFFER_SIZE, remaining)])
+        if not count:
+            break
+        remote_file.write(view[:count])
+        remaining -= count
+        if on_progress:
+            on_progress(count)
+
+    return length - remaining
+
+
+def upload_bundle(sftp, local_path, remote_path, callback=None):
+    """Upload a file with pipelined SFTP writes so requests are not acknowledged one at a time"""
+    file_size = os.path.getsize(local_path)
+    transferred = [0]
+
+    def on_progress(count):
+        transferred[0] += count
+        if callback:
+            callback(transferred[0], file_size)
+
+    # bufsize=0 hands our slices straight to the SFTP layer without another copy
+    with open(local_path, 'rb') as local_file, sftp.file(remote_path, 'wb', bufsize=0) as remote_file:
+        return _copy_range(local_file, remote_file, file_size, on_progress)
+
+
+def _upload_range(pool, local_path, remote_path, offset, length, on_progress):
+    """Upload one byte range of the file over its own SFTP session"""
+    # Ranges beyond the pool's channel budget wait for a slot rather than exceed the node's MaxSessions
+    with pool.sftp_session() as sftp:
+        with open(local_path, 'rb') as local_file, sftp.file(remote_path, 'r+b', bufsize=0) as remote_file:
+            local_file.seek(offset)
+            remote_file.seek(offset)
+            return _copy_range(local_file, remote_file, length, on_progress)
+
+
+def upload_bundle_parallel(pool, sftp, local_path, remote_path, workers=DEFAULT_UPLOAD_WORKERS, callback=None):
+    """Upload a large file as byte ranges written concurrently over several SFTP sessions"""
+    file_size = os.path.getsize(local_path)
+    if workers < 2 or file_size < PARALLEL_UPLOAD_THRESHOLD:
+        return upload_bundle(sftp, local_path, remote_path, callback=callback)
+
+    # Pre-size the remote file so every worker can write into its own range
+    with sftp.file(remote_path, 'wb') as remote_file:
+        remote_file.truncate(file_size)
+
+    lock = threading.Lock()
+    transferred = [0]
+
+    def on_progress(count):
+        with lock:
+            transferred[0] += count
+            current = transferred[0]
+        if callback:
+            callback(current, file_size)
+
+    range_size = -(-file_size // workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_upload_range, pool, local_path, remote_path, offset,
+                            min(range_size, file_size - offset), on_progress)
+            for offset in range(0, file_size, range_size)
+        ]
+        return sum(future.result() for future in futures)
+
+
+def _send_file(channel, local_file, file_size, callback=None):
+    """Send a whole file down a channel from a read-only mapping; returns False if the channel closed early"""
+    if file_size == 0:
+        return True
+    # The channel encrypts everything it sends, so os.sendfile cannot be used; mapping the file at
+    # least lets each chunk go from the page cache to the cipher without a read() copy
+    with mmap.mmap(local_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, file_size, READ_BUFFER_SIZE):
+                with view[offset:offset + READ_BUFFER_SIZE] as chunk:
+                    channel.sendall(chunk)
+                if callback:
+                    callback(min(offset + READ_BUFFER_SIZE, file_size), file_size)
+        except OSError:
+            return False
+        finally:
+            view.release()
+    return True
+
+
+def stream_extract_bundle(pool, local_path, remote_path, extract_path, compression='gzip', callback=None,
+                          timeout=STREAM_EXTRACT_TIMEOUT):
+    """Send the bundle straight into tar on the node so extraction overlaps the upload.
+
+    tee keeps a copy at remote_path so peers can still fetch it. Returns (exit_code, stderr).
+    """
+    file_size = os.path.getsize(local_path)
+    # bash rather than the login shell, which may not understand pipefail
+    cmd = (
+        f"bash -c 'set -o pipefail; sudo mkdir -p {extract_path} && "
+        f"tee {remote_path} | sudo tar {TAR_DECOMPRESS_OPTIONS[compression]} -xf - --strip-components=1 -C {extract_path}'"
+    )
+
+    with pool.session(timeout) as channel:
+        channel.exec_command(cmd)
+        with open(local_path, 'rb') as local_file:
+            # If the remote side exits early (e.g. tar rejected the stream) its exit status is reported below
+            if _send_file(channel, local_file, file_size, callback):
+                channel.shutdown_write()
+        output, err = drain_channel(channel)
+        exit_code = channel.recv_exit_status()
+
+    return exit_code, err.decode('utf-8', 'replace')
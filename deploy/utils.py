@@ -1,17 +1,39 @@
+import os
+import sys
 import click
 import colorama
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Global token for node communication
-serverToken = None
+# Nodes are set up from several threads; keep each log line intact
+_output_lock = threading.Lock()
+
+_HOSTNAME_COLOR = colorama.Fore.YELLOW
+
+# Decided once: colour only on a terminal, and never when NO_COLOR is set (https://no-color.org)
+USE_COLOR = sys.stdout.isatty() and os.getenv('NO_COLOR') is None
+
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+def format_bytes(size):
+    """Format a byte count with a binary unit, picking the unit from the bit length instead of dividing in a loop"""
+    if size < 1024:
+        return f"{size} B"
+    unit = min(len(_BYTE_UNITS) - 1, (size.bit_length() - 1) // 10)
+    return f"{size / (1 << (10 * unit)):.2f} {_BYTE_UNITS[unit]}"
 
 def log_message(node, message, color=colorama.Fore.CYAN, details=None, details_color=colorama.Fore.MAGENTA):
     """Unified logging function for consistent formatting"""
-    base_msg = color + f"[" + colorama.Fore.YELLOW + f"{node['hostname']}" + color + f"] {message}"
-    
-    if details:
-        base_msg += " " + details_color + f"{details}"
-        
-    click.echo(base_msg)
+    # One format per line instead of a chain of concatenations
+    if not USE_COLOR:
+        base_msg = f"[{node['hostname']}] {message} {details}" if details else f"[{node['hostname']}] {message}"
+    elif details:
+        base_msg = f"{color}[{_HOSTNAME_COLOR}{node['hostname']}{color}] {message} {details_color}{details}"
+    else:
+        base_msg = f"{color}[{_HOSTNAME_COLOR}{node['hostname']}{color}] {message}"
+
+    with _output_lock:
+        click.echo(base_msg)
 
 def log_error(node, message, details=None):
     """Log an error message with consistent formatting"""
@@ -23,4 +45,19 @@ def log_success(node, message, details=None):
 
 def log_warning(node, message, details=None):
     """Log a warning message with consistent formatting"""
-    log_message(node, message, color=colorama.Fore.YELLOW, details=details, details_color=colorama.Fore.YELLOW)
\ No newline at end of file
+    log_message(node, message, color=colorama.Fore.YELLOW, details=details, details_color=colorama.Fore.YELLOW)
+
+def run_parallel(items, fn, max_workers):
+    """Call fn on each item from a thread pool and yield (item, result, error) as each one finishes.
+
+    New SSH connections are still rate limited by connect_node; nodes with a pooled connection skip that.
+    """
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
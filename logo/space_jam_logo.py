@@ -1,11 +1,11 @@
 import random
+import sys
 import time
 import colorama
 import click
 
-def display_space_jam_logo1():
-    """Display a Space Jam themed logo with stars and cosmic effects"""
-    logo = f"""
+# The logos are static, so they are composed once at import rather than on every call
+SPACE_JAM_LOGO1 = f"""
     {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
 
     {colorama.Fore.YELLOW} ███████ ██████   █████   ██████ ███████{colorama.Fore.MAGENTA}      ██████  █████  ███    ███ 
@@ -18,12 +18,22 @@ def display_space_jam_logo1():
 
     {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
     """
-    
-    click.echo(logo)
 
-def display_space_jam_logo4():
-    """Display a Space Jam themed logo with stars and cosmic effects"""
-    logo = f"""
+SPACE_JAM_LOGO3 = f"""
+    {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
+
+    {colorama.Fore.YELLOW} ███████ ██████   █████   ██████ ███████{colorama.Fore.MAGENTA}      ██  █████  ███    ███ 
+    {colorama.Fore.YELLOW}██      ██    ██ ██   ██ ██      ██     {colorama.Fore.MAGENTA}    ███ ██   ██ ████  ████ 
+    {colorama.Fore.YELLOW}███████ ██████  ███████ ██      █████   {colorama.Fore.MAGENTA}     ██ ███████ ██ ████ ██ 
+    {colorama.Fore.YELLOW}     ██ ██      ██   ██ ██      ██      {colorama.Fore.MAGENTA}     ██ ██   ██ ██  ██  ██ 
+    {colorama.Fore.YELLOW}███████ ██      ██   ██  ██████ ███████ {colorama.Fore.MAGENTA}     ██ ██   ██ ██      ██ 
+
+    {colorama.Fore.WHITE}{colorama.Style.BRIGHT}       ★ {colorama.Fore.CYAN}RKE2 {colorama.Fore.WHITE}Airgapped Kubernetes {colorama.Fore.YELLOW}Deployment {colorama.Fore.CYAN}Tool{colorama.Fore.WHITE} ★       
+
+    {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
+    """
+
+SPACE_JAM_LOGO4 = f"""
     {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
 
     {colorama.Fore.YELLOW} ███████ ██████   █████   ██████ ███████{colorama.Fore.MAGENTA}      ██████  █████  ███    ███ 
@@ -37,64 +47,66 @@ def display_space_jam_logo4():
 
     {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
     """
-    
-    click.echo(logo)
 
-def display_space_jam_logo2():
-    """Display a Space Jam themed logo with stars"""
-    space_part = """
+SPACE_JAM_LOGO2_SPACE = """
      ██████  ██████   █████   ██████ ███████    
     ██      ██    ██ ██   ██ ██      ██         
      █████  ██████  ███████ ██      █████       
          ██ ██      ██   ██ ██      ██          
     ██████  ██      ██   ██  ██████ ███████     
     """
-    
-    jam_part = """
+
+SPACE_JAM_LOGO2_JAM = """
      ██  █████  ███    ███ 
     ███ ██   ██ ████  ████ 
      ██ ███████ ██ ████ ██ 
      ██ ██   ██ ██  ██  ██ 
      ██ ██   ██ ██      ██ 
     """
-    
-    stars_top = " ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐"
-    subtitle = "           ★ RKE2 Airgapped Deployment Tool ★           "
-    stars_bottom = " ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐"
-    
-    # Display logo components with colors
-    click.echo("\n" + colorama.Fore.CYAN + stars_top)
-    click.echo("")
-    
-    # Display SPACE in yellow
-    for line in space_part.strip().split('\n'):
-        click.echo(colorama.Fore.YELLOW + line + colorama.Fore.MAGENTA + jam_part.strip().split('\n')[space_part.strip().split('\n').index(line)])
-    
-    click.echo("")
-    click.echo(colorama.Fore.WHITE + colorama.Style.BRIGHT + subtitle)
-    click.echo("")
-    click.echo(colorama.Fore.CYAN + stars_bottom + "\n")
 
-def display_space_jam_logo3():
+SPACE_JAM_LOGO2_STARS_TOP = " ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐"
+SPACE_JAM_LOGO2_SUBTITLE = "           ★ RKE2 Airgapped Deployment Tool ★           "
+SPACE_JAM_LOGO2_STARS_BOTTOM = " ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐ ⭐"
+
+def display_space_jam_logo1():
     """Display a Space Jam themed logo with stars and cosmic effects"""
-    logo = f"""
-    {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
+    click.echo(SPACE_JAM_LOGO1)
 
-    {colorama.Fore.YELLOW} ███████ ██████   █████   ██████ ███████{colorama.Fore.MAGENTA}      ██  █████  ███    ███ 
-    {colorama.Fore.YELLOW}██      ██    ██ ██   ██ ██      ██     {colorama.Fore.MAGENTA}    ███ ██   ██ ████  ████ 
-    {colorama.Fore.YELLOW}███████ ██████  ███████ ██      █████   {colorama.Fore.MAGENTA}     ██ ███████ ██ ████ ██ 
-    {colorama.Fore.YELLOW}     ██ ██      ██   ██ ██      ██      {colorama.Fore.MAGENTA}     ██ ██   ██ ██  ██  ██ 
-    {colorama.Fore.YELLOW}███████ ██      ██   ██  ██████ ███████ {colorama.Fore.MAGENTA}     ██ ██   ██ ██      ██ 
+def display_space_jam_logo4():
+    """Display a Space Jam themed logo with stars and cosmic effects"""
+    click.echo(SPACE_JAM_LOGO4)
 
-    {colorama.Fore.WHITE}{colorama.Style.BRIGHT}       ★ {colorama.Fore.CYAN}RKE2 {colorama.Fore.WHITE}Airgapped Kubernetes {colorama.Fore.YELLOW}Deployment {colorama.Fore.CYAN}Tool{colorama.Fore.WHITE} ★       
+def display_space_jam_logo2():
+    """Display a Space Jam themed logo with stars"""
+    # Pair each SPACE line with its JAM line once instead of re-splitting and searching per line
+    art = [
+        colorama.Fore.YELLOW + space + colorama.Fore.MAGENTA + jam
+        for space, jam in zip(SPACE_JAM_LOGO2_SPACE.strip().split('\n'), SPACE_JAM_LOGO2_JAM.strip().split('\n'))
+    ]
 
-    {colorama.Fore.CYAN}★ * ✧ ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ {colorama.Fore.WHITE}★{colorama.Fore.CYAN} ✦ * ✧ ★ ✦ * ✧ ★ * ✧
-    """
-    
-    click.echo(logo)
+    # One write; the explicit reset keeps the bright subtitle from bleeding into the bottom stars
+    click.echo("\n".join([
+        "\n" + colorama.Fore.CYAN + SPACE_JAM_LOGO2_STARS_TOP,
+        "",
+        *art,
+        "",
+        colorama.Fore.WHITE + colorama.Style.BRIGHT + SPACE_JAM_LOGO2_SUBTITLE + colorama.Style.RESET_ALL,
+        "",
+        colorama.Fore.CYAN + SPACE_JAM_LOGO2_STARS_BOTTOM + "\n"
+    ]))
+
+def display_space_jam_logo3():
+    """Display a Space Jam themed logo with stars and cosmic effects"""
+    click.echo(SPACE_JAM_LOGO3)
 
 def display_animated_logo():
     """Display an animated Space Jam logo with stars"""
+    # The starfield is cursor positioning that only means something on a terminal; elsewhere it
+    # would just be a second of sleeps and escape codes in the log
+    if not sys.stdout.isatty():
+        display_space_jam_logo4()
+        return
+
     # Clear screen first
     click.clear()
     
@@ -1,18 +1,73 @@
 #!/usr/bin/env python3
+import copy
+import functools
+import os
 import click
 import yaml
 import colorama
-import paramiko
-from deploy.node import setup_node
+from deploy.connection import (
+    load_private_key, set_connect_limits, check_ports_open,
+    DEFAULT_MAX_CONCURRENT_CONNECTS, DEFAULT_CONNECT_INTERVAL_MS
+)
+from deploy.ssh_pool import connections
+from deploy.node import setup_node, setup_nodes_parallel, DEFAULT_PARALLELISM
 from deploy.health import post_install_health_check
-from deploy.utils import log_message, log_error, log_success, log_warning
+from deploy.systemd import SERVER_FIREWALL_PORTS
+from deploy.transfer import describe_bundle, generate_peer_key, authorize_peer_key, revoke_peer_key
+from deploy.utils import log_message, log_error, log_success, log_warning, run_parallel, USE_COLOR
 from logo.space_jam_logo import display_animated_logo, display_space_jam_logo4
 
-colorama.init(autoreset=True)
+if USE_COLOR:
+    colorama.init(autoreset=True)
+else:
+    # Also drops the escapes in messages main.py and the logo compose themselves
+    colorama.init(strip=True)
 
-def load_config(config_file):
+UNINSTALL_SCRIPT_PATHS = (
+    "/usr/local/bin/rke2-uninstall.sh",  # Tarball installation
+    "/usr/bin/rke2-uninstall.sh"         # RPM installation
+)
+
+# Where the bundle is extracted or mounted when the config does not set tar_extract_path
+DEFAULT_EXTRACT_PATH = "/opt/rke2"
+
+# Command templates formatted with the cluster's extract path
+UNINSTALL_CLEANUP_COMMANDS = (
+    # Release a mounted squashfs bundle before removing its mount point
+    "sudo umount {extract_path} 2>/dev/null || true",
+    "sudo rm -rf /var/lib/rancher/rke2",
+    "sudo rm -rf /etc/rancher/rke2",
+    "sudo rm -rf /var/lib/kubelet",
+    "sudo rm -rf /opt/rke2",
+    "sudo rm -f /usr/local/bin/rke2",
+    "sudo rm -f /usr/local/bin/kubectl",
+    "sudo rm -f /usr/bin/rke2",
+    "sudo rm -f /etc/systemd/system/rke2-*.service",
+    "sudo rm -f /usr/share/rke2"
+)
+
+UNINSTALL_NETWORK_COMMANDS = (
+    "sudo ip link delete flannel.1 2>/dev/null || true",
+    "sudo ip link delete cni0 2>/dev/null || true",
+    "sudo ip link delete vxlan.calico 2>/dev/null || true"
+)
+
+UNINSTALL_FIREWALL_COMMANDS = (
+    "sudo firewall-cmd --permanent " + " ".join(f"--remove-port={port}" for port in SERVER_FIREWALL_PORTS) + " || true",
+    "sudo firewall-cmd --reload || true"
+)
+
+# libyaml's C loader when PyYAML was built with it, otherwise the pure-Python one
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(config_file, mtime_ns):
     with open(config_file, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YAML_LOADER)
+
+def load_config(config_file):
+    """Parse config.yml once per modification; callers get their own copy since deploy mutates it"""
+    return copy.deepcopy(_parse_config(config_file, os.stat(config_file).st_mtime_ns))
 
 @click.group()
 def cli():
@@ -23,10 +78,14 @@ def cli():
 @click.option('--config', '-c', required=True, help='Path to config.yml')
 @click.option('--extra-tools', '-e', multiple=True, type=click.Choice(['k9s', 'helm', 'flux']),
               help='Install additional tools (specify multiple times for multiple tools, e.g., -e k9s -e helm)')
-def deploy(config, extra_tools):
+@click.option('--verbose', '-v', is_flag=True, help='Run extra remote diagnostics when a step fails')
+@click.option('--no-logo', is_flag=True, help='Skip the logo and its animation')
+def deploy(config, extra_tools, verbose, no_logo):
     """Deploy RKE2 Cluster"""
-    display_animated_logo()
+    if not no_logo:
+        display_animated_logo()
     cfg = load_config(config)
+    cfg['verbose'] = verbose
 
     # Add extra_tools to config
     if extra_tools:
@@ -36,44 +95,97 @@ def deploy(config, extra_tools):
 
     click.echo(colorama.Fore.CYAN + f"Deploying RKE2 cluster: " + colorama.Fore.YELLOW + f"{cfg['cluster']['name']}\n")
 
-    servers = cfg['nodes']['servers']
+    bundle_path = cfg['cluster']['airgap_bundle_path']
+    if not os.path.exists(bundle_path):
+        click.echo(colorama.Fore.RED + f"Error: Source file {bundle_path} does not exist!")
+        return
+    click.echo(colorama.Fore.CYAN + "Computing bundle checksum...")
+    bundle = describe_bundle(bundle_path)
+
+    nodes = cfg['nodes']
+    servers = nodes['servers']
+    agents = nodes['agents']
+    # Pre-flight checks below walk every node; build the combined list once
+    all_nodes = servers + agents
+    peer = None
+    peer_key = None
+
+    ssh_cfg = cfg.get('deployment', {}).get('ssh', {})
+    set_connect_limits(
+        ssh_cfg.get('max_concurrent_connects', DEFAULT_MAX_CONCURRENT_CONNECTS),
+        ssh_cfg.get('connect_interval_ms', DEFAULT_CONNECT_INTERVAL_MS)
+    )
+
+    # Parse each distinct SSH key once before fanning out; every connection reuses the cached key
+    for key_path in sorted({node['ssh_key'] for node in all_nodes}):
+        try:
+            load_private_key(key_path)
+        except Exception as e:
+            click.echo(colorama.Fore.RED + f"Error: Unable to load SSH key {key_path}: {e}")
+            return
+
+    # Probe every node's SSH port at once so an unreachable node is reported before any setup starts
+    reachable = check_ports_open([(node['ip'], node.get('port', 22)) for node in all_nodes])
+    unreachable = [node['hostname'] for node in all_nodes if not reachable[(node['ip'], node.get('port', 22))]]
+    if unreachable:
+        click.echo(colorama.Fore.RED + f"Error: SSH port unreachable on " +
+                   colorama.Fore.YELLOW + f"{', '.join(unreachable)}")
+        return
 
     if servers: 
         first_server = servers[0]
-        click.echo(colorama.Fore.CYAN + f"[" + colorama.Fore.YELLOW + f"{node['hostname']}" + colorama.Fore.CYAN + 
-                   f"] Setting up {'first' if is_first_server else 'joining'} server " + 
-                   colorama.Fore.MAGENTA + f"({node['ip']})")
-
-        join_token = setup_node(node, cfg, is_server=True, is_first_server=True)
-        # Server nodes
-        for i, node in enumerate(servers[1:], 1):
-            click.echo(colorama.Fore.CYAN + f"[" + colorama.Fore.YELLOW + f"{node['hostname']}" + colorama.Fore.CYAN + 
-                       f"] Setting up {'first' if is_first_server else 'joining'} server " + 
-                       colorama.Fore.MAGENTA + f"({node['ip']})")
-            if join_token: 
-                cfg['cluster']['join_token'] = join_token
-                
-            setup_node(node, cfg, is_server=True, is_first_server=is_first_server)
-
-    # Agent nodes
-    for node in cfg['nodes']['agents']:
-        click.echo(colorama.Fore.CYAN + f"[" + colorama.Fore.YELLOW + f"{node['hostname']}" + colorama.Fore.CYAN + 
-                  f"] Setting up agent " + colorama.Fore.MAGENTA + f"({node['ip']})")
-        setup_node(node, cfg, is_server=False)
-    
-    # Post-install health check
-    for node in cfg['nodes']['servers']:
-        post_install_health_check(node)
+        click.echo(colorama.Fore.CYAN + f"[" + colorama.Fore.YELLOW + f"{first_server['hostname']}" + colorama.Fore.CYAN + 
+                   f"] Setting up first server " + 
+                   colorama.Fore.MAGENTA + f"({first_server['ip']})")
+
+        # setup_node stores the join token in cfg for the joining servers
+        setup_node(first_server, cfg, bundle, is_server=True, is_first_server=True)
 
-    display_space_jam_logo4()
+    # Joining servers and agents only depend on the first server
+    joining = [(node, True) for node in servers[1:]]
+    remaining = joining + [(node, False) for node in agents]
+
+    try:
+        # Remaining nodes pull the bundle from the first server instead of the deploy host
+        if servers and remaining:
+            peer_key = generate_peer_key()
+            if authorize_peer_key(connections.get(first_server), peer_key, [node['ip'] for node, _ in remaining]):
+                peer = first_server
+
+        # etcd admits one learner at a time, so servers join one after another; agents then go concurrently
+        failed = setup_nodes_parallel(joining, cfg, bundle, peer=peer, peer_key=peer_key, parallelism=1)
+        failed += setup_nodes_parallel(remaining[len(joining):], cfg, bundle, peer=peer, peer_key=peer_key)
+        if failed:
+            click.echo(colorama.Fore.RED + f"Setup failed on {len(failed)} node(s): " +
+                       colorama.Fore.YELLOW + f"{', '.join(failed)}")
+    finally:
+        # Revoke even when setup raised or was interrupted, so the key never outlives the deploy
+        if peer:
+            revoke_peer_key(connections.get(peer))
+
+    # Agents are done; the servers' connections stay open for the health checks below
+    for node in agents:
+        connections.close(node)
+
+    # Post-install health check; each server is probed on its own connection, so check them side by side
+    parallelism = cfg.get('deployment', {}).get('parallelism', DEFAULT_PARALLELISM)
+    for node, _, error in run_parallel(servers, post_install_health_check, parallelism):
+        if error:
+            log_error(node, "Error checking health:", details=str(error))
+
+    connections.close_all()
+    if not no_logo:
+        display_space_jam_logo4()
 
 
 @cli.command()
 @click.option('--config', '-c', required=True, help='Path to config.yml')
 @click.option('--force', '-f', is_flag=True, help='Force uninstall without confirmation')
-def uninstall(config, force):
+@click.option('--no-logo', is_flag=True, help='Skip the logo and its animation')
+def uninstall(config, force, no_logo):
     """Uninstall RKE2 Cluster"""
-    display_animated_logo()
+    if not no_logo:
+        display_animated_logo()
 
     cfg = load_config(config)
     
@@ -90,36 +202,40 @@ def uninstall(config, force):
             click.echo(colorama.Fore.CYAN + "Uninstall cancelled.")
             return
     
-    # First uninstall from agent nodes
-    for node in cfg['nodes']['agents']:
-        click.echo(colorama.Fore.CYAN + f"[" + colorama.Fore.YELLOW + f"{node['hostname']}" + colorama.Fore.CYAN + 
-                  f"] Uninstalling RKE2 agent " + colorama.Fore.MAGENTA + f"({node['ip']})")
-        uninstall_rke2(node, is_server=False)
+    extract_path = cfg['cluster'].get('tar_extract_path', DEFAULT_EXTRACT_PATH)
+
+    # First uninstall from agent nodes; they are independent of each other, so tear them down concurrently
+    def uninstall_agent(node):
+        log_message(node, "Uninstalling RKE2 agent", details=f"({node['ip']})")
+        uninstall_rke2(node, is_server=False, extract_path=extract_path)
+
+    parallelism = cfg.get('deployment', {}).get('parallelism', DEFAULT_PARALLELISM)
+    for node, _, error in run_parallel(cfg['nodes']['agents'], uninstall_agent, parallelism):
+        if error:
+            log_error(node, "Error uninstalling RKE2:", details=str(error))
     
-    # Then uninstall from server nodes in reverse order (last-in, first-out)
+    # Then uninstall from server nodes in reverse order (last-in, first-out), one at a time so
+    # etcd members leave the cluster one by one
     for node in reversed(cfg['nodes']['servers']):
         click.echo(colorama.Fore.CYAN + f"[" + colorama.Fore.YELLOW + f"{node['hostname']}" + colorama.Fore.CYAN + 
                   f"] Uninstalling RKE2 server " + colorama.Fore.MAGENTA + f"({node['ip']})")
-        uninstall_rke2(node, is_server=True)
+        uninstall_rke2(node, is_server=True, extract_path=extract_path)
     
+    connections.close_all()
+
     click.echo(colorama.Fore.GREEN + f"RKE2 uninstallation complete for cluster " + 
                colorama.Fore.YELLOW + f"{cfg['cluster']['name']}")
     
-    display_space_jam_logo4()
+    if not no_logo:
+        display_space_jam_logo4()
 
-def uninstall_rke2(node, is_server=True):
+def uninstall_rke2(node, is_server=True, extract_path=DEFAULT_EXTRACT_PATH):
     """Uninstall RKE2 from a node"""
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    
+    pool = connections.get(node)
     try:
         # Connect to the node
         log_message(node, "Connecting to", details=f"{node['ip']}...")
-        ssh.connect(
-            hostname=node['ip'],
-            username=node['user'],
-            key_filename=node['ssh_key']
-        )
+        pool.connect()
         
         service_type = "server" if is_server else "agent"
         
@@ -130,81 +246,41 @@ def uninstall_rke2(node, is_server=True):
             f"sudo systemctl disable rke2-{service_type}"
         ]
         
-        for cmd in commands:
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            exit_code = stdout.channel.recv_exit_status()
-            if exit_code != 0:
-                err = stderr.read().decode()
-                log_warning(node, f"Warning during command '{cmd}':", details=err)
+        for step in pool.run_script(commands, stop_on_error=False):
+            if step.exit_code != 0:
+                log_warning(node, f"Warning during command '{step.command}':", details=step.output)
         
-        # Step 2: Run the uninstall script
+        # Step 2: Run the first uninstall script that exists; the path that succeeded is printed last
         log_message(node, "Running RKE2 uninstall script...")
-        uninstall_paths = [
-            "/usr/local/bin/rke2-uninstall.sh",  # Tarball installation
-            "/usr/bin/rke2-uninstall.sh"         # RPM installation
-        ]
-        
-        uninstall_success = False
-        for script_path in uninstall_paths:
-            stdin, stdout, stderr = ssh.exec_command(f"test -f {script_path} && echo 'exists'")
-            if stdout.read().decode().strip() == 'exists':
-                stdin, stdout, stderr = ssh.exec_command(f"sudo {script_path}")
-                exit_code = stdout.channel.recv_exit_status()
-                if exit_code == 0:
-                    log_success(node, f"Uninstall script at {script_path} executed successfully")
-                    uninstall_success = True
-                    break
-                else:
-                    log_error(node, f"Uninstall script failed:", details=stderr.read().decode())
+        exit_code, output, err = pool.exec(
+            f"rc=0; for s in {' '.join(UNINSTALL_SCRIPT_PATHS)}; do "
+            '[ -f "$s" ] || continue; sudo "$s" && { echo "$s"; exit 0; }; rc=$?; done; exit $rc'
+        )
+        ran = output.strip().splitlines()[-1:]
         
-        if not uninstall_success:
+        if exit_code == 0 and ran and ran[0] in UNINSTALL_SCRIPT_PATHS:
+            log_success(node, f"Uninstall script at {ran[0]} executed successfully")
+        else:
+            if exit_code != 0:
+                log_error(node, f"Uninstall script failed:", details=err)
             log_warning(node, "Uninstall script not found, attempting manual cleanup...")
         
         # Step 3: Additional cleanup for any left behind files
+        # Not checking exit codes for cleanup - some files might not exist
         log_message(node, "Cleaning up remaining RKE2 files and directories...")
-        cleanup_commands = [
-            "sudo rm -rf /var/lib/rancher/rke2",
-            "sudo rm -rf /etc/rancher/rke2",
-            "sudo rm -rf /var/lib/kubelet",
-            "sudo rm -rf /opt/rke2",
-            "sudo rm -f /usr/local/bin/rke2",
-            "sudo rm -f /usr/local/bin/kubectl",
-            "sudo rm -f /usr/bin/rke2",
-            "sudo rm -f /etc/systemd/system/rke2-*.service",
-            "sudo rm -f /usr/share/rke2"
-        ]
-        
-        for cmd in cleanup_commands:
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            # Not checking exit code for cleanup - some files might not exist
+        pool.run_script([cmd.format(extract_path=extract_path) for cmd in UNINSTALL_CLEANUP_COMMANDS],
+                        stop_on_error=False)
         
         # Step 4: Remove network interfaces
         log_message(node, "Cleaning up network interfaces...")
-        network_commands = [
-            "sudo ip link delete flannel.1 2>/dev/null || true",
-            "sudo ip link delete cni0 2>/dev/null || true",
-            "sudo ip link delete vxlan.calico 2>/dev/null || true"
-        ]
-        
-        for cmd in network_commands:
-            stdin, stdout, stderr = ssh.exec_command(cmd)
+        pool.run_script(UNINSTALL_NETWORK_COMMANDS, stop_on_error=False)
         
         # Step 5: Reset firewall rules if it's a server
         if is_server:
             log_message(node, "Resetting firewall rules...")
-            firewall_commands = [
-                "sudo firewall-cmd --permanent --remove-port=9345/tcp || true",
-                "sudo firewall-cmd --permanent --remove-port=6443/tcp || true", 
-                "sudo firewall-cmd --permanent --remove-port=8472/udp || true",
-                "sudo firewall-cmd --permanent --remove-port=10250/tcp || true",
-                "sudo firewall-cmd --reload || true"
-            ]
-            
-            for cmd in firewall_commands:
-                stdin, stdout, stderr = ssh.exec_command(cmd)
+            pool.run_script(UNINSTALL_FIREWALL_COMMANDS, stop_on_error=False)
         
         log_success(node, f"RKE2 {service_type} uninstalled successfully")
-        ssh.close()
         
     except Exception as e:
         log_error(node, f"Error uninstalling RKE2:", details=str(e))